@@ -7,44 +7,202 @@ Extracts pharmaceutical data from PDFs using DocStrange
 import sys
 import json
 import os
-import traceback
+import re
+import string
+import argparse
+import asyncio
+import hashlib
+import mmap
+import tempfile
+import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Optional, Tuple
 
 try:
-    from docstrange import DocumentExtractor
-except ImportError as e:
-    print(json.dumps({
-        "success": False,
-        "error": f"DocStrange not installed: {str(e)}. Please run: pip install docstrange"
-    }))
-    sys.exit(1)
+    import orjson
+except ImportError:
+    orjson = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def dumps_json(data: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            # orjson rejects values stdlib json accepts (e.g. integers wider than 64 bits)
+            pass
+    # Match orjson's raw UTF-8 output and separators so both encoders emit the same bytes
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _write_json(data: Any, indent: bool = False) -> None:
+    """Write one JSON document to stdout as UTF-8, followed by a newline"""
+    sys.stdout.buffer.write(dumps_json(data, indent) + b"\n")
+    sys.stdout.buffer.flush()
+
+# Bump whenever extraction/parsing rules change so stale cache entries are ignored
+EXTRACTION_VERSION = 3
+
+# Enhanced patterns for pharmaceutical data, merged into one alternation so each
+# line costs a single match call; branches are tried in order like separate patterns
+_NUMBER = r'\d+(?:\.\d+)?'
+_ITEM_NAME = r'[A-Z][A-Z\s\d\-\.\(\)\/]{3,50}'
+_ROW_BRANCHES = ('full', 'spaced', 'tabbed')
+_ROW_PATTERNS = (
+    # Pattern 1: Name followed by numbers (space separated)
+    rf'^(?P<full_name>{_ITEM_NAME})\s+(?P<full_nums>{_NUMBER}(?:\s+{_NUMBER}){{5}}(?:\s+{_NUMBER})?)',
+    # Pattern 2: Name with multiple spaces then numbers
+    rf'^(?P<spaced_name>{_ITEM_NAME})\s{{2,}}(?P<spaced_nums>[\d\s\.]+)$',
+    # Pattern 3: Tab separated values
+    rf'^(?P<tabbed_name>{_ITEM_NAME})\t+(?P<tabbed_nums>[\d\t\.]+)$'
+)
+# _ROW_TAIL_RES[i] tries branches i onwards; used to fall through when a name is rejected
+_ROW_TAIL_RES = [re.compile('|'.join(_ROW_PATTERNS[i:])) for i in range(len(_ROW_PATTERNS))]
+_PHARMA_ROW_RE = _ROW_TAIL_RES[0]
+
+# Column header keywords; any line containing one of them is skipped
+HEADER_KEYWORDS = frozenset({
+    'ITEM', 'NAME', 'MEDICINE', 'DRUG', 'S.NO', 'SR.NO',
+    'OPENING', 'PURCHASE', 'SALES', 'CLOSING', 'QTY', 'QUANTITY'
+})
+_HEADER_RE = re.compile('|'.join(re.escape(header) for header in sorted(HEADER_KEYWORDS)))
+
+_NUM_RE = re.compile(r'\d+(?:\.\d+)?')
+
+# Translation tables for single-pass character classification of item names;
+# whitespace is allowed too and is dropped separately via str.split()
+_DELETE_LETTERS = str.maketrans('', '', string.ascii_letters)
+_DELETE_NAME_CHARS = str.maketrans('', '', string.ascii_letters + string.digits + '-.()/')
+
+# Maximum number of unique items returned per document
+MAX_ITEMS = 50
+
+# Inventory columns following the item name in a stock statement row
+ROW_NUMBER_FIELDS = 7
+
+def _pack_numbers(values: List[str]) -> List[float]:
+    """Convert numeric cells into a fixed-size row, zero-filling missing columns"""
+    values = values[:ROW_NUMBER_FIELDS]
+    numbers = [0.0] * ROW_NUMBER_FIELDS
+    numbers[:len(values)] = map(float, values)
+    return numbers
+
+def file_sha256(file_path: str) -> str:
+    """Compute the SHA-256 hex digest of a file's contents"""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        
+        # Older Pythons: hash a read-only mapping of the file (mmap rejects empty files)
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+
+class DocStrangeInitError(RuntimeError):
+    """DocStrange could not be imported or its DocumentExtractor failed to initialize"""
+
+class ExtractionCache:
+    """Persistent JSON cache of extraction results keyed by PDF content hash"""
+    
+    def __init__(self, cache_dir: str):
+        """Create the cache directory if it does not exist yet"""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def _entry_path(self, mode: str, digest: str) -> Path:
+        """Path of the cache entry for (mode, extraction version, content hash)"""
+        return self.cache_dir / f"{mode}-v{EXTRACTION_VERSION}-{digest}.json"
+    
+    def get(self, mode: str, digest: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result, or None on a miss or unreadable entry"""
+        try:
+            with open(self._entry_path(mode, digest), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {digest}: {e}")
+            return None
+    
+    def put(self, mode: str, digest: str, result: Dict[str, Any]) -> None:
+        """Store a result atomically so concurrent readers never see partial files"""
+        tmp_path = None
+        try:
+            payload = dumps_json(result)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._entry_path(mode, digest))
+            tmp_path = None
+        except (OSError, TypeError, ValueError) as e:
+            # Caching is best-effort: never turn a successful extraction into an error
+            logger.warning(f"Failed to write cache entry {digest}: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
 class PharmaDataExtractor:
     """Pharmaceutical data extractor using DocStrange"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the extractor with optional API key for cloud processing"""
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None):
+        """
+        Configure the extractor with optional API key and result cache directory
+        
+        DocStrange itself is imported and initialized on first use, so cache hits
+        never pay for loading it.
+        """
+        self.cache = ExtractionCache(cache_dir) if cache_dir else None
+        self.api_key = api_key if api_key else None
+        # Use cloud processing with API key for 10k docs/month, else free cloud processing (limited)
+        self.mode = "cloud_authenticated" if self.api_key else "cloud_free"
+        self._extractor = None
+        self._extractor_lock = threading.Lock()
+    
+    @property
+    def extractor(self):
+        """DocStrange DocumentExtractor, created on first access"""
+        with self._extractor_lock:
+            if self._extractor is None:
+                self._extractor = self._create_extractor()
+            return self._extractor
+    
+    def _create_extractor(self):
+        """
+        Import DocStrange and initialize a DocumentExtractor for the configured mode
+        
+        Raises:
+            DocStrangeInitError: if DocStrange is missing or fails to initialize; this is
+                not turned into a per-file error response by extract_pharmaceutical_data
+        """
+        try:
+            from docstrange import DocumentExtractor
+        except ImportError as e:
+            raise DocStrangeInitError(f"DocStrange not installed: {str(e)}. Please run: pip install docstrange") from e
+        
         try:
-            if api_key and api_key != "":
-                # Use cloud processing with API key for 10k docs/month
-                self.extractor = DocumentExtractor(api_key=api_key)
-                self.mode = "cloud_authenticated"
+            if self.api_key:
+                extractor = DocumentExtractor(api_key=self.api_key)
                 logger.info("🔑 Initialized DocStrange with API key (10k docs/month)")
             else:
-                # Use free cloud processing (limited)
-                self.extractor = DocumentExtractor()
-                self.mode = "cloud_free"
+                extractor = DocumentExtractor()
                 logger.info("☁️ Initialized DocStrange in free cloud mode")
+            return extractor
                 
         except Exception as e:
             logger.error(f"Failed to initialize DocStrange: {e}")
-            raise
+            raise DocStrangeInitError(str(e)) from e
     
     def extract_pharmaceutical_data(self, file_path: str) -> Dict[str, Any]:
         """
@@ -55,88 +213,213 @@ class PharmaDataExtractor:
             
         Returns:
             Dictionary with extraction results
+            
+        Raises:
+            DocStrangeInitError: if DocStrange is needed but cannot be initialized
         """
         try:
-            # Validate file exists
-            if not os.path.exists(file_path):
-                return {
-                    "success": False,
-                    "error": f"File not found: {file_path}"
-                }
-            
-            # Check file size (reasonable limits)
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            logger.info(f"📄 Processing file: {os.path.basename(file_path)} ({file_size_mb:.2f} MB)")
-            
-            if file_size_mb > 50:  # 50MB limit for free tier
-                return {
-                    "success": False,
-                    "error": f"File too large ({file_size_mb:.2f} MB). Maximum size is 50MB."
-                }
-            
-            # Extract using DocStrange
-            logger.info("🔬 Starting DocStrange extraction...")
-            result = self.extractor.extract(file_path)
-            
-            # Try different extraction methods
-            extracted_data = self._try_extraction_methods(result)
+            result, digest = self._prepare_file(file_path)
+            if result is None:
+                extracted_data = self._fetch_text(file_path)
+                result = self._build_response(extracted_data, digest)
+            return result
+        
+        except DocStrangeInitError:
+            raise
+        except Exception as e:
+            return self._extraction_error(e)
+    
+    async def extract_many(
+        self,
+        file_paths: List[str],
+        max_concurrency: int = 4,
+        on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract pharmaceutical data from several PDFs concurrently
+        
+        Each file moves through the prepare (disk), fetch (network) and parse (CPU)
+        stages independently; only the fetch stage runs on a pool bounded by
+        max_concurrency, so cache hits and parsing never wait behind in-flight
+        DocStrange calls.
+        
+        Args:
+            file_paths: Paths to the PDF files
+            max_concurrency: Maximum number of DocStrange calls in flight (fallback
+                extraction methods run one at a time per file to stay within it)
+            on_result: Optional callback invoked with (file_path, result) as each file finishes
             
-            if extracted_data["success"]:
-                # Parse pharmaceutical data from extracted text
-                pharma_data = self._parse_pharmaceutical_data(extracted_data["text"])
-                
-                return {
-                    "success": True,
-                    "data": pharma_data,
-                    "mode": self.mode,
-                    "extracted_text_length": len(extracted_data["text"]),
-                    "text_preview": extracted_data["text"][:200] + "..." if len(extracted_data["text"]) > 200 else extracted_data["text"]
-                }
-            else:
-                return extracted_data
+        Returns:
+            Extraction results in the same order as file_paths
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        loop = asyncio.get_running_loop()
+        
+        # Fetches get their own pool sized to the limit; prepare/parse stay on the loop's
+        # default executor so they are never queued behind in-flight DocStrange calls
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="docstrange-fetch") as fetch_pool:
+            async def extract_one(file_path: str) -> Dict[str, Any]:
+                try:
+                    result, digest = await asyncio.to_thread(self._prepare_file, file_path)
+                    if result is None:
+                        extracted_data = await loop.run_in_executor(fetch_pool, self._fetch_text, file_path, False)
+                        result = await asyncio.to_thread(self._build_response, extracted_data, digest)
+                except Exception as e:
+                    result = self._extraction_error(e)
                 
-        except Exception as e:
-            logger.error(f"DocStrange extraction failed: {e}")
-            logger.error(traceback.format_exc())
+                if on_result:
+                    on_result(file_path, result)
+                return result
+            
+            return await asyncio.gather(*(extract_one(path) for path in file_paths))
+    
+    def _prepare_file(self, file_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Validate the file and look it up in the cache
+        
+        Returns:
+            (result, digest) where result is set when no DocStrange call is needed
+            (validation error or cache hit) and digest is the content hash when caching
+        """
+        # Validate file exists and read its size with a single stat call
+        try:
+            file_stat = os.stat(file_path)
+        except (OSError, ValueError):
+            # Same cases os.path.exists reports as missing: bad components, permissions, NUL bytes
+            return {
+                "success": False,
+                "error": f"File not found: {file_path}"
+            }, None
+        
+        # Check file size (reasonable limits)
+        file_size_mb = file_stat.st_size / (1024 * 1024)
+        logger.info(f"📄 Processing file: {os.path.basename(file_path)} ({file_size_mb:.2f} MB)")
+        
+        if file_size_mb > 50:  # 50MB limit for free tier
             return {
                 "success": False,
-                "error": f"DocStrange extraction failed: {str(e)}"
-            }
+                "error": f"File too large ({file_size_mb:.2f} MB). Maximum size is 50MB."
+            }, None
+        
+        # Serve repeat documents from the content-addressed cache
+        digest = None
+        if self.cache:
+            digest = file_sha256(file_path)
+            cached = self.cache.get(self.mode, digest)
+            if cached is not None:
+                logger.info(f"⚡ Cache hit for {digest[:12]}, skipping DocStrange")
+                return cached, digest
+        
+        return None, digest
+    
+    def _fetch_text(self, file_path: str, concurrent_fallbacks: bool = True) -> Dict[str, Any]:
+        """Run DocStrange on the file and pull text out of the result"""
+        logger.info("🔬 Starting DocStrange extraction...")
+        result = self.extractor.extract(file_path)
+        
+        # Try different extraction methods
+        return self._try_extraction_methods(result, concurrent_fallbacks)
+    
+    def _build_response(self, extracted_data: Dict[str, Any], digest: Optional[str]) -> Dict[str, Any]:
+        """Parse extracted text into pharmaceutical items and cache the response"""
+        if not extracted_data["success"]:
+            return extracted_data
+        
+        # Parse pharmaceutical data from extracted text
+        text = extracted_data["text"]
+        pharma_data = self._parse_pharmaceutical_data(text)
+        
+        response = {
+            "success": True,
+            "data": pharma_data,
+            "mode": self.mode,
+            "extracted_text_length": len(text),
+            "text_preview": text[:200] + "..." if len(text) > 200 else text
+        }
+        
+        if self.cache:
+            self.cache.put(self.mode, digest, response)
+        
+        return response
     
-    def _try_extraction_methods(self, result) -> Dict[str, Any]:
-        """Try different DocStrange extraction methods"""
-        
-        methods = [
-            ("Markdown", lambda: result.extract_markdown()),
-            ("Text", lambda: result.extract_text()),
-            ("HTML", lambda: result.extract_html()),
-            ("JSON Data", lambda: self._extract_structured_data(result))
+    def _extraction_error(self, e: Exception) -> Dict[str, Any]:
+        """Log an extraction failure (from inside its except block) and build the error response"""
+        logger.exception(f"DocStrange extraction failed: {e}")
+        return {
+            "success": False,
+            "error": f"DocStrange extraction failed: {str(e)}"
+        }
+    
+    def _try_extraction_methods(self, result, concurrent_fallbacks: bool = True) -> Dict[str, Any]:
+        """
+        Try different DocStrange extraction methods
+        
+        Args:
+            result: DocStrange extraction result
+            concurrent_fallbacks: Run methods sharing a round in parallel threads; callers that
+                bound DocStrange calls per worker (extract_many) pass False to keep one call
+                in flight at a time
+        """
+        
+        # Methods in order of preference, grouped into rounds; a round runs only if every
+        # method before it came up short, and methods within a round may run concurrently.
+        # Structured field extraction consumes extra quota, so it stays in a round of its own.
+        rounds = [
+            [("Markdown", lambda: result.extract_markdown())],
+            [("Text", lambda: result.extract_text()),
+             ("HTML", lambda: result.extract_html())],
+            [("JSON Data", lambda: self._extract_structured_data(result))]
         ]
         
-        for method_name, method_func in methods:
-            try:
-                logger.info(f"🔍 Trying {method_name} extraction...")
-                extracted_content = method_func()
-                
-                if extracted_content and len(str(extracted_content).strip()) > 10:
-                    logger.info(f"✅ {method_name} extraction successful!")
-                    return {
-                        "success": True,
-                        "text": str(extracted_content),
-                        "method": method_name.lower()
-                    }
-                else:
-                    logger.warning(f"⚠️ {method_name} extraction returned insufficient data")
-                    
-            except Exception as e:
-                logger.warning(f"❌ {method_name} extraction failed: {e}")
+        for methods in rounds:
+            if len(methods) == 1 or not concurrent_fallbacks:
+                for method_name, method_func in methods:
+                    extracted = self._run_extraction_method(method_name, method_func)
+                    if extracted:
+                        return extracted
                 continue
+            
+            # Concurrent methods share one result object across threads, which assumes
+            # DocStrange's per-format extract_* calls are safe to run in parallel.
+            # Wait for every call in the round so none outlives the caller.
+            with ThreadPoolExecutor(max_workers=len(methods)) as executor:
+                futures = [
+                    executor.submit(self._run_extraction_method, method_name, method_func)
+                    for method_name, method_func in methods
+                ]
+
+            for future in futures:
+                extracted = future.result()
+                if extracted:
+                    return extracted
         
         return {
             "success": False,
             "error": "All extraction methods failed to return sufficient data"
         }
     
+    def _run_extraction_method(self, method_name: str, method_func: Callable[[], Any]) -> Optional[Dict[str, Any]]:
+        """Run one extraction method, returning its result only if it yielded enough text"""
+        try:
+            logger.info(f"🔍 Trying {method_name} extraction...")
+            extracted_content = method_func()
+            
+            if extracted_content and len(str(extracted_content).strip()) > 10:
+                logger.info(f"✅ {method_name} extraction successful!")
+                return {
+                    "success": True,
+                    "text": str(extracted_content),
+                    "method": method_name.lower()
+                }
+            else:
+                logger.warning(f"⚠️ {method_name} extraction returned insufficient data")
+                
+        except Exception as e:
+            logger.warning(f"❌ {method_name} extraction failed: {e}")
+        
+        return None
+    
     def _extract_structured_data(self, result) -> str:
         """Extract structured pharmaceutical data using DocStrange"""
         try:
@@ -156,12 +439,12 @@ class PharmaDataExtractor:
             structured_data = result.extract_data(specified_fields=pharma_fields)
             
             if structured_data and isinstance(structured_data, dict):
-                return json.dumps(structured_data, indent=2)
+                return dumps_json(structured_data, indent=True).decode('utf-8')
             else:
                 # Fallback to general JSON extraction
                 logger.info("📊 Fallback to general JSON extraction...")
                 general_data = result.extract_data()
-                return json.dumps(general_data, indent=2) if general_data else ""
+                return dumps_json(general_data, indent=True).decode('utf-8') if general_data else ""
                 
         except Exception as e:
             logger.warning(f"Structured extraction failed: {e}")
@@ -170,140 +453,171 @@ class PharmaDataExtractor:
     def _parse_pharmaceutical_data(self, text: str) -> List[Dict[str, Any]]:
         """Parse pharmaceutical inventory data from extracted text"""
         
-        pharma_items = []
-        lines = text.split('\n')
+        # Keyed by item name (already stripped and upper-case by construction) to drop duplicates
+        unique_items: Dict[str, Dict[str, Any]] = {}
+        lines = text.splitlines()
         
         logger.info(f"📋 Analyzing {len(lines)} lines for pharmaceutical patterns...")
         
-        for line_num, line in enumerate(lines):
+        for line in lines:
             line = line.strip()
             
-            # Skip empty lines and headers
-            if not line or len(line) < 5:
+            # Skip empty and too-short lines
+            if len(line) < 5:
                 continue
             
             # Skip common headers
-            if any(header in line.upper() for header in [
-                'ITEM', 'NAME', 'MEDICINE', 'DRUG', 'S.NO', 'SR.NO', 
-                'OPENING', 'PURCHASE', 'SALES', 'CLOSING', 'QTY', 'QUANTITY'
-            ]):
+            if _HEADER_RE.search(line.upper()):
                 continue
             
             # Try enhanced pharmaceutical patterns
             item_data = self._extract_pharma_item(line)
-            if item_data:
-                pharma_items.append(item_data)
-        
-        # Remove duplicates based on item name
-        seen_names = set()
-        unique_items = []
-        for item in pharma_items:
-            name_key = item.get('itemName', '').upper().strip()
-            if name_key and name_key not in seen_names:
-                seen_names.add(name_key)
-                unique_items.append(item)
+            if item_data and item_data["itemName"] not in unique_items:
+                unique_items[item_data["itemName"]] = item_data
+                if len(unique_items) >= MAX_ITEMS:
+                    break
         
         logger.info(f"💊 Extracted {len(unique_items)} unique pharmaceutical items")
-        return unique_items[:50]  # Limit to 50 items
+        return list(unique_items.values())
     
     def _extract_pharma_item(self, line: str) -> Optional[Dict[str, Any]]:
         """Extract pharmaceutical item data from a line"""
-        import re
-        
-        # Enhanced patterns for pharmaceutical data
-        patterns = [
-            # Pattern 1: Name followed by numbers (space separated)
-            r'^([A-Z][A-Z\s\d\-\.\(\)\/]{3,50})\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)(?:\s+(\d+(?:\.\d+)?))?',
+        line = line.strip()
+        match = _PHARMA_ROW_RE.match(line)
+        start = 0
+        while match:
+            branch = next(b for b in _ROW_BRANCHES[start:] if match.group(f"{b}_name") is not None)
+            item_name = match.group(f"{branch}_name").strip()
             
-            # Pattern 2: Name with multiple spaces then numbers
-            r'^([A-Z][A-Z\s\d\-\.\(\)\/]{3,50})\s{2,}([\d\s\.]+)$',
+            # Validate item name (should look like a medicine name)
+            if self._is_valid_medicine_name(item_name):
+                break
             
-            # Pattern 3: Tab separated values
-            r'^([A-Z][A-Z\s\d\-\.\(\)\/]{3,50})\t+([\d\t\.]+)$'
-        ]
+            # Rejected name: fall through to the later patterns
+            start = _ROW_BRANCHES.index(branch) + 1
+            match = _ROW_TAIL_RES[start].match(line) if start < len(_ROW_TAIL_RES) else None
+        else:
+            return None
         
-        for pattern in patterns:
-            match = re.match(pattern, line.strip())
-            if match:
-                groups = match.groups()
-                item_name = groups[0].strip()
-                
-                # Validate item name (should look like a medicine name)
-                if not self._is_valid_medicine_name(item_name):
-                    continue
-                
-                # Extract numbers
-                if len(groups) >= 7:  # Full pattern match
-                    numbers = [float(g) if g else 0 for g in groups[1:8]]
-                else:  # Pattern with number string
-                    number_str = groups[1] if len(groups) > 1 else ""
-                    numbers = [float(x) for x in re.findall(r'\d+(?:\.\d+)?', number_str)]
-                
-                # Ensure we have at least 4 numbers
-                while len(numbers) < 7:
-                    numbers.append(0)
-                
-                return {
-                    "itemName": item_name,
-                    "openingQty": int(numbers[0]) if numbers[0] else None,
-                    "purchaseQty": int(numbers[1]) if numbers[1] else None,
-                    "purchaseFree": int(numbers[2]) if numbers[2] else None,
-                    "salesQty": int(numbers[3]) if numbers[3] else None,
-                    "salesValue": round(numbers[4], 2) if numbers[4] else None,
-                    "closingQty": int(numbers[5]) if numbers[5] else None,
-                    "closingValue": round(numbers[6], 2) if numbers[6] else None
-                }
+        # Extract numbers
+        numbers = _pack_numbers(_NUM_RE.findall(match.group(f"{branch}_nums")))
         
-        return None
+        return {
+            "itemName": item_name,
+            "openingQty": int(numbers[0]) if numbers[0] else None,
+            "purchaseQty": int(numbers[1]) if numbers[1] else None,
+            "purchaseFree": int(numbers[2]) if numbers[2] else None,
+            "salesQty": int(numbers[3]) if numbers[3] else None,
+            "salesValue": round(numbers[4], 2) if numbers[4] else None,
+            "closingQty": int(numbers[5]) if numbers[5] else None,
+            "closingValue": round(numbers[6], 2) if numbers[6] else None
+        }
     
     def _is_valid_medicine_name(self, name: str) -> bool:
         """Validate if the name looks like a medicine name"""
         if len(name) < 3 or len(name) > 60:
             return False
         
-        # Should contain letters
-        if not re.search(r'[A-Za-z]', name):
-            return False
-        
-        # Should not be only numbers
-        if re.match(r'^\d+\.?\d*$', name.strip()):
+        # Should contain letters (which also rules out purely numeric names)
+        if len(name.translate(_DELETE_LETTERS)) == len(name):
             return False
         
         # Should not contain too many special characters
-        special_chars = len(re.findall(r'[^A-Za-z0-9\s\-\.\(\)\/]', name))
+        special_chars = len(''.join(name.translate(_DELETE_NAME_CHARS).split()))
         if special_chars > len(name) * 0.3:  # More than 30% special chars
             return False
         
         return True
 
+def _emit_json_line(file_path: str, result: Dict[str, Any]) -> None:
+    """Write one result as a single JSON line tagged with its file path"""
+    _write_json({"file": file_path, **result})
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that must be a whole number of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
 def main():
     """Main function to handle command line arguments"""
     
-    if len(sys.argv) < 2:
-        print(json.dumps({
+    parser = argparse.ArgumentParser(description="Extract pharmaceutical data from PDFs using DocStrange")
+    parser.add_argument("file_path", nargs="?", help="Path to the PDF file")
+    parser.add_argument("api_key", nargs="?", help="DocStrange API key for authenticated cloud processing")
+    parser.add_argument("--cache-dir", help="Directory for caching extraction results by PDF content hash")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--batch", metavar="PATHS_FILE",
+                        help="Extract every PDF listed (one path per line) in PATHS_FILE, or stdin if '-', "
+                             "printing one JSON result per line as each file finishes")
+    modes.add_argument("--serve", action="store_true",
+                        help="Keep one DocStrange extractor alive, reading PDF paths from stdin line by line "
+                             "and printing one JSON result per line")
+    parser.add_argument("--api-key", dest="api_key_option", help="DocStrange API key (alternative to the positional form)")
+    parser.add_argument("--max-concurrency", type=_positive_int, default=4, help="Maximum DocStrange calls in flight in batch mode")
+    args = parser.parse_args()
+    
+    if args.file_path and (args.batch or args.serve):
+        parser.error("a positional pdf_file_path cannot be combined with --batch or --serve "
+                     "(pass the API key with --api-key in those modes)")
+    
+    if not args.file_path and not args.batch and not args.serve:
+        _write_json({
             "success": False,
-            "error": "Usage: python docstrange_service.py <pdf_file_path> [api_key]"
-        }))
+            "error": "Usage: python docstrange_service.py <pdf_file_path> [api_key] [--cache-dir DIR] "
+                     "| --batch PATHS_FILE [--api-key KEY] [--max-concurrency N] | --serve [--api-key KEY]"
+        })
         sys.exit(1)
     
-    file_path = sys.argv[1]
-    api_key = sys.argv[2] if len(sys.argv) > 2 else None
+    file_path = args.file_path
+    api_key = args.api_key or args.api_key_option
     
     try:
         # Initialize extractor
-        extractor = PharmaDataExtractor(api_key=api_key)
+        extractor = PharmaDataExtractor(api_key=api_key, cache_dir=args.cache_dir)
+        
+        if args.batch:
+            # Stream results as JSON lines so callers can consume them incrementally
+            paths_file = sys.stdin if args.batch == "-" else open(args.batch, 'r', encoding='utf-8')
+            with paths_file:
+                file_paths = [line.strip() for line in paths_file if line.strip()]
+            
+            asyncio.run(extractor.extract_many(file_paths, args.max_concurrency, on_result=_emit_json_line))
+            return
+        
+        if args.serve:
+            # Long-lived worker: reuse the initialized extractor for every path on stdin
+            for line in sys.stdin:
+                path = line.strip()
+                if not path:
+                    continue
+                
+                # A failure on one path is reported for that path and never ends the worker
+                try:
+                    _emit_json_line(path, extractor.extract_pharmaceutical_data(path))
+                except Exception as e:
+                    logger.exception(f"Failed to process {path}")
+                    _emit_json_line(path, {
+                        "success": False,
+                        "error": f"Extraction failed: {str(e)}"
+                    })
+            return
         
         # Extract pharmaceutical data
         result = extractor.extract_pharmaceutical_data(file_path)
         
         # Output JSON result
-        print(json.dumps(result, indent=2))
+        _write_json(result, indent=True)
         
     except Exception as e:
-        print(json.dumps({
+        _write_json({
             "success": False,
             "error": f"Extraction failed: {str(e)}"
-        }))
+        })
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -104,6 +104,10 @@ async function callDocStrangePythonService(filePath: string, apiKey?: string): P
     let stdout = '';
     let stderr = '';
     
+    // Decode as UTF-8 across chunk boundaries so multi-byte characters are never split
+    pythonProcess.stdout.setEncoding('utf8');
+    pythonProcess.stderr.setEncoding('utf8');
+    
     // Collect stdout
     pythonProcess.stdout.on('data', (data) => {
       stdout += data.toString();